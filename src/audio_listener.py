@@ -1,59 +1,98 @@
 from __future__ import annotations
 
+import bisect
 import collections
-import io
 import logging
-import queue
+import struct
 import threading
 import time
-import wave
-from dataclasses import dataclass
+from concurrent.futures import CancelledError, Future
 from typing import Deque, Optional
 
+import numpy as np
+import rtmixer
 import sounddevice as sd
-import webrtcvad
+from numba import njit
 
-from .config import CONFIG, WhisperConfig
+from .config import WhisperConfig, get_config
 from .whisper_client import WhisperClient
 
 log = logging.getLogger(__name__)
 
+RING_BUFFER_SECONDS = 2.0
+MAX_TRANSCRIPTIONS_IN_FLIGHT = 2
+MAX_HELD_UTTERANCES = 4
+WHISPER_PROMPT_CHARS = 200
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+NOISE_FLOOR_MIN = 100.0  # mean square of int16 samples, roughly -70 dBFS
+NOISE_FLOOR_SEED_MS = 500
 
-@dataclass
-class TranscriptSegment:
-    timestamp: float
-    text: str
+
+def _next_pow2(value: int) -> int:
+    return 1 << max(0, int(value) - 1).bit_length()
+
+
+@njit(cache=True)
+def _frame_stats(samples: np.ndarray) -> tuple[float, int]:
+    # Mean energy and zero-crossing count in a single compiled pass.
+    energy = 0.0
+    crossings = 0
+    prev = samples[0]
+    for i in range(1, samples.size):
+        x = samples[i]
+        energy += float(x) * float(x)
+        crossings += (x ^ prev) < 0
+        prev = x
+    return energy / samples.size, crossings
 
 
 class AudioListener:
     def __init__(self, whisper_client: WhisperClient, config: WhisperConfig | None = None) -> None:
-        self.config = config or CONFIG.whisper
+        self.config = config or get_config().whisper
         self.whisper_client = whisper_client
-        self.vad = webrtcvad.Vad(self.config.vad_sensitivity)
         self.sample_rate = self.config.sample_rate
         self.frame_duration_ms = self.config.chunk_duration_ms
         self.frame_size = int(self.sample_rate * self.frame_duration_ms / 1000)
-        self.audio_queue: queue.Queue[bytes] = queue.Queue()
         self.stop_event = threading.Event()
         self.pause_event = threading.Event()
         self.processor_thread: threading.Thread | None = None
-        self.stream: Optional[sd.RawInputStream] = None
-        self.transcripts: Deque[TranscriptSegment] = collections.deque()
+        self.recorder: Optional[rtmixer.Recorder] = None
+        self.ringbuffer: Optional[rtmixer.RingBuffer] = None
+        self._record_action = None
+        self.ring_capacity = _next_pow2(self.sample_rate * RING_BUFFER_SECONDS)
+        self.dropped_frames = 0
+        # Scratch buffers reused for every frame; the processor copies only the
+        # frames it keeps, so silence never hits the allocator.
+        self._read_buffer = np.empty(self.frame_size, dtype=np.float32)
+        self._pcm_frame = np.empty(self.frame_size, dtype=np.int16)
+        self._wav_header = bytearray(WAV_HEADER.size)
+        # Parallel lists kept sorted by monotonic timestamp so cutoffs are a bisect.
+        self._times: list[float] = []
+        self._texts: list[str] = []
+        # Tail of everything transcribed so far; unlike _texts it survives
+        # get_recent_transcript() and is fed back to Whisper as context.
+        self._committed_text = ""
         self.transcript_lock = threading.Lock()
+        self._transcription_lock = threading.Lock()
+        self._in_flight = 0
+        self._held_wavs: list[bytes] = []
         self.input_device = self._resolve_input_device(self.config.input_device)
 
     def start(self) -> None:
         self.stop_event.clear()
+        _frame_stats(self._pcm_frame)  # JIT-compile before audio arrives
         try:
-            self.stream = sd.RawInputStream(
+            # rtmixer records from its C callback straight into a PortAudio ring
+            # buffer, so the real-time thread never touches the GIL.
+            self.recorder = rtmixer.Recorder(
                 samplerate=self.sample_rate,
                 blocksize=self.frame_size,
-                dtype="int16",
                 channels=1,
                 device=self.input_device,
-                callback=self._audio_callback,
             )
-            self.stream.start()
+            self.ringbuffer = rtmixer.RingBuffer(self.recorder.samplesize, self.ring_capacity)
+            self.recorder.start()
+            self._record_action = self.recorder.record_ringbuffer(self.ringbuffer)
         except Exception as exc:  # noqa: BLE001
             log.error("Failed to start audio stream: %s", exc)
             raise
@@ -63,64 +102,122 @@ class AudioListener:
 
     def stop(self) -> None:
         self.stop_event.set()
-        if self.stream:
+        if self.recorder:
             try:
-                self.stream.stop()
-                self.stream.close()
+                self.recorder.stop()
+                self.recorder.close()
             except Exception as exc:  # noqa: BLE001
                 log.warning("Error stopping audio stream: %s", exc)
         if self.processor_thread and self.processor_thread.is_alive():
             self.processor_thread.join(timeout=2.0)
         log.info("Audio listener stopped")
 
-    def _audio_callback(self, indata: bytes, frames: int, time_info, status) -> None:  # type: ignore[override]
-        if status:
-            log.debug("Audio callback status: %s", status)
-        if self.pause_event.is_set():
+    def _ensure_recording(self) -> None:
+        # rtmixer retires the record action for good as soon as the ring has less
+        # than one block free, so any stall longer than the ring would otherwise
+        # leave the microphone dead. Discard the backlog and re-arm.
+        assert self.recorder is not None and self.ringbuffer is not None
+        if self._record_action in self.recorder.actions:
             return
-        self.audio_queue.put(bytes(indata))
+        stale_frames = self.ringbuffer.read_available // self.frame_size
+        self._clear_pending_audio()
+        self.dropped_frames += stale_frames
+        self._record_action = self.recorder.record_ringbuffer(self.ringbuffer)
+        log.warning("Audio ring buffer overflowed; dropped %d frame(s) and resumed recording", stale_frames)
+
+    def _read_frame(self) -> Optional[np.ndarray]:
+        assert self.ringbuffer is not None
+        self._ensure_recording()
+        available = self.ringbuffer.read_available
+        if available < self.frame_size:
+            return None
+        if available > self.ring_capacity - 2 * self.frame_size:
+            self._drop_stale_audio(available)
+        self.ringbuffer.readinto(self._read_buffer)
+        # rtmixer streams are float32; the VAD works on 16-bit PCM.
+        np.clip(self._read_buffer, -1.0, 1.0, out=self._read_buffer)
+        np.multiply(self._read_buffer, 32767.0, out=self._read_buffer)
+        self._pcm_frame[:] = self._read_buffer
+        return self._pcm_frame
+
+    def _drop_stale_audio(self, available: int) -> None:
+        # Once the ring is full rtmixer stops recording altogether. A processor
+        # that is running but lagging skips the oldest whole frames before that
+        # point, so it resumes on fresh audio; a stall that gets there anyway is
+        # caught by _ensure_recording.
+        assert self.ringbuffer is not None
+        stale_frames = (available - self.ring_capacity // 2) // self.frame_size
+        if stale_frames <= 0:
+            return
+        self.ringbuffer.advance_read_index(stale_frames * self.frame_size)
+        self.dropped_frames += stale_frames
+        log.warning("Audio processor fell behind; dropped %d stale frame(s) (%d total)", stale_frames, self.dropped_frames)
+
+    def _time_until_frame(self) -> float:
+        assert self.ringbuffer is not None
+        missing = self.frame_size - self.ringbuffer.read_available
+        return max(missing, 0) / self.sample_rate
 
     def _process_frames(self) -> None:
-        voiced_frames: list[bytes] = []
+        voiced_frames: list[np.ndarray] = []
         activation_frames = max(1, self.config.activation_ms // self.frame_duration_ms)
-        pending_frames: Deque[bytes] = collections.deque(maxlen=activation_frames)
+        pending_frames: Deque[np.ndarray] = collections.deque(maxlen=activation_frames)
         voice_active = False
         speech_run = 0
         last_voice_time = 0.0
         min_frames = max(1, self.config.min_voice_ms // self.frame_duration_ms)
         silence_limit = self.config.silence_timeout
-        while not self.stop_event.is_set():
-            if self.pause_event.is_set():
+        energy_gate = self.config.energy_gate
+        min_crossings = self.frame_size // 32
+        noise_floor = 0.0
+        seed_frames = max(1, NOISE_FLOOR_SEED_MS // self.frame_duration_ms)
+        seeded = 0
+        # Bound once: this loop runs for every frame.
+        stop_is_set = self.stop_event.is_set
+        pause_is_set = self.pause_event.is_set
+        wait = self.stop_event.wait
+        read_frame = self._read_frame
+        frame_stats = _frame_stats
+        now_fn = time.monotonic
+        while not stop_is_set():
+            if pause_is_set():
+                self._clear_pending_audio()
                 voiced_frames.clear()
                 pending_frames.clear()
                 speech_run = 0
-                time.sleep(0.05)
+                wait(0.05)
                 continue
-            try:
-                frame = self.audio_queue.get(timeout=0.1)
-            except queue.Empty:
-                frame = None
-            now = time.time()
+            frame = read_frame()
+            now = now_fn()
             if frame is None:
-                pending_frames.clear()
-                speech_run = 0
+                # Sleep until the recorder should have a full frame; stop() wakes us early.
+                wait(self._time_until_frame())
                 if voice_active and now - last_voice_time > silence_limit:
                     self._flush_frames(voiced_frames, min_frames)
                     voiced_frames.clear()
                     voice_active = False
                 continue
-            is_speech = False
-            try:
-                is_speech = self.vad.is_speech(frame, self.sample_rate)
-            except Exception as exc:  # noqa: BLE001
-                log.debug("VAD failed on frame: %s", exc)
+            energy, crossings = frame_stats(frame)
+            if seeded < seed_frames:
+                # Average the first frames that carry real signal into the floor. A
+                # muted or warming-up mic delivers digital silence, which would leave
+                # a zero floor that lets any room noise through as speech.
+                if energy >= NOISE_FLOOR_MIN:
+                    seeded += 1
+                    noise_floor += (energy - noise_floor) / seeded
+                continue
+            is_speech = energy > noise_floor * energy_gate and crossings > min_crossings
+            # Track the floor quickly through silence and only creep during speech,
+            # so a persistently louder room is eventually re-learned.
+            rate = 0.001 if is_speech else 0.02
+            noise_floor = max(noise_floor + rate * (energy - noise_floor), NOISE_FLOOR_MIN)
             if is_speech:
                 speech_run += 1
                 if voice_active:
-                    voiced_frames.append(frame)
+                    voiced_frames.append(frame.copy())
                     last_voice_time = now
                 else:
-                    pending_frames.append(frame)
+                    pending_frames.append(frame.copy())
                     if speech_run >= activation_frames:
                         voice_active = True
                         voiced_frames.extend(pending_frames)
@@ -130,7 +227,7 @@ class AudioListener:
             speech_run = 0
             pending_frames.clear()
             if voice_active:
-                voiced_frames.append(frame)
+                voiced_frames.append(frame.copy())
                 if now - last_voice_time > silence_limit:
                     self._flush_frames(voiced_frames, min_frames)
                     voiced_frames.clear()
@@ -184,7 +281,6 @@ class AudioListener:
         if not self.pause_event.is_set():
             log.debug("Pausing audio capture")
             self.pause_event.set()
-            self._clear_pending_audio()
 
     def resume(self) -> None:
         if self.pause_event.is_set():
@@ -192,46 +288,99 @@ class AudioListener:
             self.pause_event.clear()
 
     def _clear_pending_audio(self) -> None:
-        while True:
-            try:
-                self.audio_queue.get_nowait()
-            except queue.Empty:
-                break
+        # Only the processor thread advances the read index, keeping the ring
+        # buffer single-producer/single-consumer.
+        if self.ringbuffer is not None:
+            self.ringbuffer.advance_read_index(self.ringbuffer.read_available)
 
-    def _flush_frames(self, frames: list[bytes], min_frames: int) -> None:
+    def _flush_frames(self, frames: list[np.ndarray], min_frames: int) -> None:
         if len(frames) < min_frames:
             frames.clear()
             return
         wav_bytes = self._frames_to_wav(frames)
         frames.clear()
-        print("transcribing")
-        result = self.whisper_client.transcribe_wav(wav_bytes)
-        if not result:
+        with self._transcription_lock:
+            if self._in_flight >= MAX_TRANSCRIPTIONS_IN_FLIGHT:
+                # Hold the utterance; it goes out with any others in the next batch.
+                self._held_wavs.append(wav_bytes)
+                if len(self._held_wavs) > MAX_HELD_UTTERANCES:
+                    del self._held_wavs[0]
+                    log.warning("Transcription backlog full; dropping oldest utterance")
+                return
+            self._in_flight += 1
+        log.debug("Submitting utterance for transcription")
+        self._dispatch_transcriptions([wav_bytes])
+
+    def _dispatch_transcriptions(self, wavs: list[bytes]) -> None:
+        try:
+            with self.transcript_lock:
+                prompt = self._committed_text
+            future = self.whisper_client.submit_batch(wavs, prompt=prompt or None)
+        except RuntimeError:
+            with self._transcription_lock:
+                self._in_flight -= 1
+            log.debug("Whisper client closed; dropping %d utterance(s)", len(wavs))
             return
-        self._append_transcript(result.text)
-
-    def _frames_to_wav(self, frames: list[bytes]) -> bytes:
-        buffer = io.BytesIO()
-        with wave.open(buffer, "wb") as wave_file:
-            wave_file.setnchannels(1)
-            wave_file.setsampwidth(2)
-            wave_file.setframerate(self.sample_rate)
-            for frame in frames:
-                wave_file.writeframes(frame)
-        return buffer.getvalue()
+        future.add_done_callback(self._store_transcriptions)
+
+    def _store_transcriptions(self, future: Future) -> None:
+        try:
+            results = future.result()
+        except CancelledError:
+            results = []
+        for result in results:
+            if result:
+                self._append_transcript(result.text)
+        with self._transcription_lock:
+            held, self._held_wavs = self._held_wavs, []
+            if not held:
+                self._in_flight -= 1
+        if held:
+            # Reuse this slot for the whole backlog, sent concurrently.
+            log.debug("Transcribing %d held utterance(s) in one batch", len(held))
+            self._dispatch_transcriptions(held)
+
+    def _frames_to_wav(self, frames: list[np.ndarray]) -> bytes:
+        payload_len = sum(frame.nbytes for frame in frames)
+        WAV_HEADER.pack_into(
+            self._wav_header,
+            0,
+            b"RIFF",
+            36 + payload_len,
+            b"WAVE",
+            b"fmt ",
+            16,
+            1,  # PCM
+            1,  # mono
+            self.sample_rate,
+            self.sample_rate * 2,
+            2,
+            16,
+            b"data",
+            payload_len,
+        )
+        # Frames are contiguous int16 arrays, so join reads their buffers directly:
+        # one copy into the result instead of concatenate + tobytes + header + payload.
+        return b"".join((self._wav_header, *frames))
 
     def _append_transcript(self, text: str) -> None:
-        entry = TranscriptSegment(timestamp=time.time(), text=text.strip())
+        cleaned = text.strip()
         with self.transcript_lock:
-            self.transcripts.append(entry)
-            cutoff = entry.timestamp - self.config.history_seconds
-            while self.transcripts and self.transcripts[0].timestamp < cutoff:
-                self.transcripts.popleft()
-        log.info("Captured transcript: %s", entry.text)
+            timestamp = time.monotonic()
+            self._times.append(timestamp)
+            self._texts.append(cleaned)
+            self._committed_text = f"{self._committed_text} {cleaned}".strip()[-WHISPER_PROMPT_CHARS:]
+            idx = bisect.bisect_left(self._times, timestamp - self.config.history_seconds)
+            if idx:
+                del self._times[:idx]
+                del self._texts[:idx]
+        log.info("Captured transcript: %s", cleaned)
 
     def get_recent_transcript(self, window: float | None = None) -> str:
-        cutoff = time.time() - (window if window is not None else self.config.history_seconds)
+        cutoff = time.monotonic() - (window if window is not None else self.config.history_seconds)
         with self.transcript_lock:
-            recent = [segment.text for segment in self.transcripts if segment.timestamp >= cutoff]
-            self.transcripts.clear()
+            idx = bisect.bisect_left(self._times, cutoff)
+            recent = self._texts[idx:]
+            self._times = []
+            self._texts = []
         return "\n".join(recent)
@@ -3,13 +3,14 @@ from __future__ import annotations
 import logging
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Callable, Sequence
 
 import cv2
 
-from .config import CONFIG, CameraConfig
+from .config import CameraConfig, get_config
 
 log = logging.getLogger(__name__)
 
@@ -28,14 +29,39 @@ class CameraWatcher:
         config: CameraConfig | None = None,
         camera_index: int = 0,
     ) -> None:
-        self.config = config or CONFIG.camera
+        self.config = config or get_config().camera
         self.on_event = on_event
         self.camera_index = camera_index
         self.stop_event = threading.Event()
         self.thread: threading.Thread | None = None
         self.capture: cv2.VideoCapture | None = None
-        cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-        self.detector = cv2.CascadeClassifier(cascade_path)
+        self._io_exec = ThreadPoolExecutor(max_workers=1, thread_name_prefix="camera-io")
+        cv2.setUseOptimized(True)
+        self.face_model = self._load_face_model()
+        self.detector: cv2.CascadeClassifier | None = None
+        if self.face_model is None:
+            cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+            self.detector = cv2.CascadeClassifier(cascade_path)
+
+    def _load_face_model(self):
+        model_path = self.config.face_model_path
+        if not hasattr(cv2, "FaceDetectorYN") or not model_path.is_file():
+            log.info("YuNet face model not found at %s; falling back to Haar cascade", model_path)
+            return None
+        try:
+            model = cv2.FaceDetectorYN.create(
+                str(model_path),
+                "",
+                (320, 240),
+                self.config.detection_score_threshold,
+                0.3,
+                5000,
+            )
+        except cv2.error as exc:
+            log.warning("Failed to load YuNet face model %s; falling back to Haar cascade (%s)", model_path, exc)
+            return None
+        log.info("Using YuNet face detector from %s", model_path)
+        return model
 
     def start(self) -> None:
         self.stop_event.clear()
@@ -59,6 +85,7 @@ class CameraWatcher:
         if self.capture is not None:
             self.capture.release()
             self.capture = None
+        self._io_exec.shutdown(wait=True)
         log.info("Camera watcher stopped")
 
     def _run(self) -> None:
@@ -70,20 +97,64 @@ class CameraWatcher:
                 log.warning("Camera frame grab failed")
                 time.sleep(interval)
                 continue
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.detector.detectMultiScale(
-                gray,
-                scaleFactor=self.config.detection_scale_factor,
-                minNeighbors=self.config.detection_min_neighbors,
-            )
+            faces, scale = self._detect_faces(frame)
             if len(faces) > 0:
                 timestamp = time.time()
                 filename = f"capture_{int(timestamp)}.jpg"
                 path = self.config.output_dir / filename
-                cv2.imwrite(str(path), frame)
-                event = CameraEvent(image_path=path, timestamp=timestamp, faces=list(map(tuple, faces)))
+                event = CameraEvent(image_path=path, timestamp=timestamp, faces=self._rescale_faces(faces, scale))
                 try:
-                    self.on_event(event)
-                except Exception as exc:  # noqa: BLE001
-                    log.error("Camera event callback failed: %s", exc)
+                    self._io_exec.submit(self._save_and_emit, frame, event)
+                except RuntimeError:
+                    log.debug("Camera I/O executor shut down; dropping capture")
             time.sleep(interval)
+
+    def _save_and_emit(self, frame, event: CameraEvent) -> None:
+        # The JPEG encode runs off the detection loop; the event is only emitted
+        # once the file exists so consumers can read it straight away.
+        try:
+            ok = cv2.imwrite(str(event.image_path), frame, [cv2.IMWRITE_JPEG_QUALITY, self.config.jpeg_quality])
+        except cv2.error as exc:
+            log.error("Failed to write capture %s: %s", event.image_path, exc)
+            return
+        if not ok:
+            log.error("Failed to write capture %s", event.image_path)
+            return
+        try:
+            self.on_event(event)
+        except Exception as exc:  # noqa: BLE001
+            log.error("Camera event callback failed: %s", exc)
+
+    def _detect_faces(self, frame):
+        if self.face_model is not None:
+            # YuNet takes BGR input directly.
+            small, scale = self._downsample(frame)
+            self.face_model.setInputSize((small.shape[1], small.shape[0]))
+            _, faces = self.face_model.detect(small)
+            if faces is None:
+                return [], scale
+            return faces[:, :4], scale
+        assert self.detector is not None
+        # Resize before converting so the colour kernel touches fewer pixels.
+        small, scale = self._downsample(frame)
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        small = cv2.equalizeHist(small)
+        faces = self.detector.detectMultiScale(
+            small,
+            scaleFactor=self.config.detection_scale_factor,
+            minNeighbors=self.config.detection_min_neighbors,
+        )
+        return faces, scale
+
+    def _downsample(self, image):
+        height, width = image.shape[:2]
+        target_width = self.config.detection_width
+        if target_width <= 0 or width <= target_width:
+            return image, 1.0
+        scale = target_width / width
+        small = cv2.resize(image, (target_width, int(height * scale)), interpolation=cv2.INTER_AREA)
+        return small, scale
+
+    @staticmethod
+    def _rescale_faces(faces, scale: float) -> list[tuple[int, int, int, int]]:
+        return [tuple(int(round(v / scale)) for v in face[:4]) for face in faces]  # type: ignore[misc]
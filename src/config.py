@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -15,7 +16,7 @@ class WhisperConfig:
     sample_rate: int = int(os.getenv("AUDIO_SAMPLE_RATE", 16000))
     chunk_duration_ms: int = int(os.getenv("VOICE_CHUNK_DURATION_MS", 30))
     activation_ms: int = int(os.getenv("VOICE_ACTIVATION_MS", 400))
-    vad_sensitivity: int = int(os.getenv("VAD_SENSITIVITY", 3))
+    energy_gate: float = float(os.getenv("VAD_ENERGY_GATE", 4.0))
     silence_timeout: float = float(os.getenv("VOICE_SILENCE_TIMEOUT", 1.0))
     min_voice_ms: int = int(os.getenv("VOICE_MIN_MS", 1000))
     history_seconds: int = int(os.getenv("TRANSCRIPT_HISTORY_SECONDS", 30))
@@ -28,7 +29,11 @@ class CameraConfig:
     capture_interval: float = float(os.getenv("CAPTURE_INTERVAL_SECONDS", 10.0))
     detection_scale_factor: float = float(os.getenv("DETECTION_SCALE_FACTOR", 1.2))
     detection_min_neighbors: int = int(os.getenv("DETECTION_MIN_NEIGHBORS", 5))
+    detection_width: int = int(os.getenv("DETECTION_WIDTH", 320))
+    detection_score_threshold: float = float(os.getenv("DETECTION_SCORE_THRESHOLD", 0.7))
+    face_model_path: Path = Path(os.getenv("FACE_DETECTION_MODEL", "models/face_detection_yunet_2023mar_int8.onnx"))
     output_dir: Path = Path(os.getenv("CAPTURE_OUTPUT_DIR", "captures"))
+    jpeg_quality: int = int(os.getenv("CAPTURE_JPEG_QUALITY", 80))
 
 """
             '''"You are the spirit of this haunted house. Narrate who you see "
@@ -52,6 +57,7 @@ class GPTConfig:
         ),
     )
     api_key: str | None = os.getenv("OPENAI_API_KEY")
+    state_path: Path = Path(os.getenv("CONVERSATION_STATE_PATH", "~/.halloween/state.json")).expanduser()
 
 
 @dataclass
@@ -67,14 +73,17 @@ class ElevenLabsConfig:
 
 @dataclass
 class AppConfig:
-    whisper: WhisperConfig = WhisperConfig()
-    camera: CameraConfig = CameraConfig()
-    gpt: GPTConfig = GPTConfig()
-    elevenlabs: ElevenLabsConfig = ElevenLabsConfig()
+    whisper: WhisperConfig = field(default_factory=WhisperConfig)
+    camera: CameraConfig = field(default_factory=CameraConfig)
+    gpt: GPTConfig = field(default_factory=GPTConfig)
+    elevenlabs: ElevenLabsConfig = field(default_factory=ElevenLabsConfig)
 
     def ensure_dirs(self) -> None:
         self.camera.output_dir.mkdir(parents=True, exist_ok=True)
 
 
-CONFIG = AppConfig()
-CONFIG.ensure_dirs()
+@lru_cache(maxsize=None)
+def get_config() -> AppConfig:
+    config = AppConfig()
+    config.ensure_dirs()
+    return config
@@ -1,34 +1,155 @@
 from __future__ import annotations
 
 import logging
+import shutil
 import subprocess
 import tempfile
+import threading
 from pathlib import Path
+from typing import ContextManager, Optional
 
-import requests
+import httpx
+import sounddevice as sd
 
-from .config import CONFIG, ElevenLabsConfig
+from .config import ElevenLabsConfig, get_config
+from .openai_transport import create_http_client
 
 log = logging.getLogger(__name__)
 
+PCM_SAMPLE_RATE = 22050
+
 
 class SpookyVoice:
-    def __init__(self, config: ElevenLabsConfig | None = None) -> None:
-        self.config = config or CONFIG.elevenlabs
+    def __init__(self, config: ElevenLabsConfig | None = None, http_client: httpx.Client | None = None) -> None:
+        self.config = config or get_config().elevenlabs
         if not self.config.api_key:
             raise ValueError("ELEVENLABS_API_KEY is required for text-to-speech")
         self.base_url = "https://api.elevenlabs.io/v1"
+        self.ffplay = shutil.which("ffplay")
+        # Keep-alive HTTP/2 pool so TCP+TLS is reused across turns. A borrowed
+        # pool belongs to the caller, which closes it.
+        self._owns_http = http_client is None
+        self._http = http_client or create_http_client()
+        self._headers = {"xi-api-key": self.config.api_key}
+        self._output: Optional[sd.RawOutputStream] = None
+        self._output_failed = False
+        # Held around every write so close() never frees the stream mid-write.
+        self._output_lock = threading.Lock()
+        self._aborted = threading.Event()
+
+    def abort(self) -> None:
+        # Cut off any reply being played so the speaking thread returns promptly;
+        # no further audio is played after this.
+        self._aborted.set()
+        output = self._output
+        if output is not None:
+            try:
+                output.abort()
+            except Exception as exc:  # noqa: BLE001
+                log.debug("Error aborting audio output: %s", exc)
+
+    def close(self) -> None:
+        self._aborted.set()
+        with self._output_lock:
+            self._close_output()
+        if self._owns_http:
+            self._http.close()
+
+    def finish_reply(self) -> None:
+        # write() returns once audio is buffered, not played. Stopping the stream
+        # waits for the buffer to drain, so the caller can unmute the microphone
+        # without it hearing the tail of the reply. The next reply reopens it.
+        with self._output_lock:
+            self._close_output()
+
+    def warm(self) -> None:
+        # Open the connection and the output device before the first reply needs them.
+        try:
+            self._http.get(f"{self.base_url}/models", headers=self._headers, timeout=5.0)
+        except httpx.HTTPError as exc:
+            log.debug("ElevenLabs pre-warm request failed: %s", exc)
+        self._ensure_output()
 
     def speak(self, text: str) -> bool:
-        if not text.strip():
+        if not text.strip() or self._aborted.is_set():
             return False
+        # A device that fails mid-reply (say, a Bluetooth speaker dropping out) is
+        # reopened and the sentence retried once before falling back to MP3.
+        for _ in range(2):
+            output = self._ensure_output()
+            if output is None:
+                break
+            try:
+                return self._speak_pcm(text, output)
+            except sd.PortAudioError as exc:
+                if self._aborted.is_set():
+                    return False
+                log.warning("Audio output failed; reopening it (%s)", exc)
+                with self._output_lock:
+                    self._close_output()
+        if self._aborted.is_set():
+            return False
+        return self._speak_mp3(text)
+
+    def _speak_pcm(self, text: str, output: sd.RawOutputStream) -> bool:
         try:
-            audio = self._synthesize(text)
+            with self._synthesize(text, f"pcm_{PCM_SAMPLE_RATE}") as response:
+                response.raise_for_status()
+                return self._play_pcm(response, output)
+        except sd.PortAudioError:
+            raise
         except Exception as exc:  # noqa: BLE001
             log.error("ElevenLabs generation failed: %s", exc)
             return False
-        if not self._play_audio(audio):
+
+    def _speak_mp3(self, text: str) -> bool:
+        try:
+            with self._synthesize(text, "mp3_22050_32") as response:
+                response.raise_for_status()
+                if self.ffplay:
+                    return self._play_stream(response)
+                audio = response.read()
+        except Exception as exc:  # noqa: BLE001
+            log.error("ElevenLabs generation failed: %s", exc)
             return False
+        return self._play_audio(audio)
+
+    def _ensure_output(self) -> Optional[sd.RawOutputStream]:
+        if self._output is None and not self._output_failed and not self._aborted.is_set():
+            try:
+                output = sd.RawOutputStream(samplerate=PCM_SAMPLE_RATE, channels=1, dtype="int16")
+                output.start()
+            except Exception as exc:  # noqa: BLE001
+                log.warning("Audio output unavailable; falling back to MP3 playback (%s)", exc)
+                self._output_failed = True
+            else:
+                self._output = output
+        return self._output
+
+    def _close_output(self) -> None:
+        # Caller holds _output_lock.
+        if self._output is None:
+            return
+        try:
+            self._output.stop()
+            self._output.close()
+        except Exception as exc:  # noqa: BLE001
+            log.debug("Error closing audio output: %s", exc)
+        self._output = None
+
+    def _play_pcm(self, response: httpx.Response, output: sd.RawOutputStream) -> bool:
+        # Raw PCM goes straight to the device as it arrives; no decoder process.
+        # Device errors propagate so speak() can reopen the output.
+        leftover = b""
+        for chunk in response.iter_bytes(4096):
+            data = leftover + chunk
+            usable = len(data) - len(data) % 2  # whole int16 samples only
+            if usable:
+                with self._output_lock:
+                    if self._aborted.is_set():
+                        return False
+                    output.write(data[:usable])
+            leftover = data[usable:]
         return True
 
     def _voice_settings(self) -> dict[str, float | bool]:
@@ -39,20 +160,59 @@ class SpookyVoice:
             "use_speaker_boost": self.config.use_speaker_boost,
         }
 
-    def _synthesize(self, text: str) -> bytes:
-        url = f"{self.base_url}/text-to-speech/{self.config.voice_id}"
-        headers = {
-            "xi-api-key": self.config.api_key or "",
-            "Accept": "audio/mpeg",
-        }
+    def _synthesize(self, text: str, output_format: str) -> ContextManager[httpx.Response]:
+        url = f"{self.base_url}/text-to-speech/{self.config.voice_id}/stream"
+        params = {"optimize_streaming_latency": 3, "output_format": output_format}
         payload = {
             "text": text,
             "model_id": self.config.model,
             "voice_settings": self._voice_settings(),
         }
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
-        response.raise_for_status()
-        return response.content
+        return self._http.stream(
+            "POST",
+            url,
+            params=params,
+            headers=self._headers,
+            json=payload,
+        )
+
+    def _play_stream(self, response: httpx.Response) -> bool:
+        # Pipe the MP3 into ffplay as it downloads so playback starts on the first chunk.
+        assert self.ffplay is not None
+        try:
+            player = subprocess.Popen(
+                [self.ffplay, "-nodisp", "-autoexit", "-loglevel", "quiet", "-i", "pipe:0"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as exc:
+            log.error("Failed to launch ffplay: %s", exc)
+            return False
+        assert player.stdin is not None
+        try:
+            for chunk in response.iter_bytes(4096):
+                if self._aborted.is_set():
+                    player.terminate()
+                    break
+                if chunk:
+                    player.stdin.write(chunk)
+        except BrokenPipeError:
+            log.warning("ffplay closed its input early")
+        except Exception as exc:  # noqa: BLE001
+            log.error("ElevenLabs audio stream interrupted: %s", exc)
+        finally:
+            try:
+                player.stdin.close()
+            except BrokenPipeError:
+                pass
+        returncode = player.wait()
+        if self._aborted.is_set():
+            return False
+        if returncode != 0:
+            log.error("ffplay exited with status %s", returncode)
+            return False
+        return True
 
     def _play_audio(self, audio: bytes) -> bool:
         play_helper = None
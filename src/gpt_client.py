@@ -1,30 +1,60 @@
 from __future__ import annotations
 
-import base64
+import collections
+import hashlib
 import logging
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator
 
+import httpx
 from openai import OpenAI
 
-from .config import CONFIG, GPTConfig
+try:  # SIMD base64 when available; the stdlib module has the same API
+    import pybase64 as base64  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - optional speedup
+    import base64
+
+from .config import GPTConfig, get_config
+from .openai_transport import create_http_client
 
 log = logging.getLogger(__name__)
 
+IMAGE_CACHE_SIZE = 8  # (path, mtime, size) -> content digest; entries are tiny
+IMAGE_URL_CACHE_SIZE = 4  # content digest -> data URL; each holds a base64'd JPEG
+
+
+def _lru_get(cache: collections.OrderedDict, key: Any) -> Any:
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _lru_put(cache: collections.OrderedDict, key: Any, value: Any, limit: int) -> None:
+    cache[key] = value
+    if len(cache) > limit:
+        cache.popitem(last=False)
+
 
 class GPTClient:
-    def __init__(self, config: GPTConfig | None = None) -> None:
-        self.config = config or CONFIG.gpt
+    def __init__(self, config: GPTConfig | None = None, http_client: httpx.Client | None = None) -> None:
+        self.config = config or get_config().gpt
         if not self.config.api_key:
             raise ValueError("OPENAI_API_KEY is required for GPT interactions")
-        self.client = OpenAI(api_key=self.config.api_key)
+        # A borrowed pool belongs to the caller, which closes it.
+        self._owns_http = http_client is None
+        self.client = OpenAI(api_key=self.config.api_key, http_client=http_client or create_http_client())
+        self._path_digests: collections.OrderedDict[tuple[str, int, int], bytes] = collections.OrderedDict()
+        self._url_cache: collections.OrderedDict[tuple[bytes, str], str] = collections.OrderedDict()
+
+    def close(self) -> None:
+        if self._owns_http:
+            self.client.close()
 
-    def _encode_image(self, image_path: Path) -> str:
-        data = image_path.read_bytes()
-        return base64.b64encode(data).decode("utf-8")
+    def _encode_image(self, data: bytes) -> str:
+        return base64.b64encode(memoryview(data)).decode("ascii")
 
     def encode_image_data_url(self, image_path: Path) -> str:
-        encoded = self._encode_image(image_path)
         ext = image_path.suffix.lower().lstrip(".")
         if ext in {"jpg", "jpeg", ""}:
             mime = "jpeg"
@@ -32,7 +62,26 @@ class GPTClient:
             mime = ext
         else:
             mime = "jpeg"
-        return f"data:image/{mime};base64,{encoded}"
+        # A known file skips straight to its digest; an unseen file is read and
+        # hashed, which still beats base64 and catches identical frames saved
+        # under new names when the scene is static.
+        st = image_path.stat()
+        path_key = (str(image_path), st.st_mtime_ns, st.st_size)
+        data: bytes | None = None
+        digest = _lru_get(self._path_digests, path_key)
+        if digest is None:
+            data = image_path.read_bytes()
+            digest = hashlib.blake2b(data, digest_size=16).digest()
+            _lru_put(self._path_digests, path_key, digest, IMAGE_CACHE_SIZE)
+        url_key = (digest, mime)
+        cached = _lru_get(self._url_cache, url_key)
+        if cached is not None:
+            return cached
+        if data is None:
+            data = image_path.read_bytes()
+        data_url = f"data:image/{mime};base64,{self._encode_image(data)}"
+        _lru_put(self._url_cache, url_key, data_url, IMAGE_URL_CACHE_SIZE)
+        return data_url
 
     def build_user_text(self, transcript: str) -> str:
         trimmed = transcript.strip()
@@ -40,15 +89,12 @@ class GPTClient:
             trimmed = "No recent speech was captured."
         return f"Recent speech:\n{trimmed}"
 
-    def generate(self, messages: list[dict[str, Any]]) -> Optional[str]:
-        print("Sending ChatGPT request")
+    def generate_stream(self, messages: list[dict[str, Any]]) -> Iterator[str]:
+        log.debug("Sending streaming ChatGPT request")
         try:
-            response = self.client.responses.create(model=self.config.model, input=messages)
+            with self.client.responses.stream(model=self.config.model, input=messages) as stream:
+                for event in stream:
+                    if event.type == "response.output_text.delta":
+                        yield event.delta
         except Exception as exc:  # noqa: BLE001
             log.error("GPT request failed: %s", exc)
-            return None
-        text = response.output_text
-        if not text:
-            log.warning("GPT response empty")
-            return None
-        return text.strip()
@@ -2,8 +2,7 @@ from __future__ import annotations
 
 import logging
 import signal
-import sys
-import time
+import threading
 
 from .orchestrator import HalloweenOrchestrator
 
@@ -23,20 +22,18 @@ def main() -> int:
         logging.exception("Failed to initialize application: %s", exc)
         return 1
 
+    stop_event = threading.Event()
+
     def handle_exit(signum, frame):  # type: ignore[return-type]
         logging.info("Received signal %s, shutting down", signum)
-        orchestrator.stop()
-        sys.exit(0)
+        stop_event.set()
 
     signal.signal(signal.SIGINT, handle_exit)
     signal.signal(signal.SIGTERM, handle_exit)
 
     try:
         orchestrator.start()
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        logging.info("Interrupted by user")
+        stop_event.wait()
     finally:
         orchestrator.stop()
     return 0
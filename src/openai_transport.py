@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import httpx
+
+# Keep-alive HTTP/2 pools with bounded timeouts so a slow server cannot wedge the
+# orchestrator. The orchestrator owns one sync pool, shared by GPT and ElevenLabs,
+# and closes it on shutdown. Whisper runs on AsyncOpenAI, which needs an async
+# pool of its own, so it does not share connections with GPT.
+_LIMITS = httpx.Limits(max_connections=8, max_keepalive_connections=8)
+_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+
+def create_http_client() -> httpx.Client:
+    return httpx.Client(http2=True, limits=_LIMITS, timeout=_TIMEOUT)
+
+
+def create_async_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(http2=True, limits=_LIMITS, timeout=_TIMEOUT)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import json
 import logging
+import os
 import queue
 import threading
 from pathlib import Path
@@ -10,29 +12,54 @@ from .audio_listener import AudioListener
 from .camera import CameraEvent, CameraWatcher
 from .elevenlabs_client import SpookyVoice
 from .gpt_client import GPTClient
+from .openai_transport import create_http_client
+from .sentences import stream_sentences
 from .whisper_client import WhisperClient
 
 log = logging.getLogger(__name__)
 
+_STOP = object()  # queued by stop() to wake the TTS thread
+
 
 class HalloweenOrchestrator:
     def __init__(self) -> None:
+        # One sync pool for GPT and ElevenLabs; closed once, in stop().
+        self.http = create_http_client()
         self.whisper = WhisperClient()
         self.audio = AudioListener(self.whisper)
-        self.voice = SpookyVoice()
-        self.gpt = GPTClient()
-        self.camera_events: queue.Queue[CameraEvent] = queue.Queue()
+        self.voice = SpookyVoice(http_client=self.http)
+        self.gpt = GPTClient(http_client=self.http)
+        # Single producer (camera) and single consumer (worker) that only ever want
+        # the newest event, so one slot replaces a queue.
+        self._latest_event: CameraEvent | None = None
+        self._event_cv = threading.Condition()
         self.camera = CameraWatcher(self._queue_camera_event)
         self.worker_stop = threading.Event()
         self.worker_thread: threading.Thread | None = None
+        # Each queued item is one reply's sentence channel, ended by None.
+        self._tts_queue: queue.Queue[queue.Queue[str | None] | object] = queue.Queue(maxsize=2)
+        self._tts_thread: threading.Thread | None = None
+        self._tts_paused = False
 
         self.inactivity_reset_seconds = 40.0
         self.max_history_entries = 14
+        # Let history grow to twice the cap before trimming, so consecutive requests
+        # share a byte-identical prefix and hit OpenAI's prompt cache.
+        self.max_history_high_water = 2 * self.max_history_entries
         self.events_since_reset = 0
         self.images_sent = 0
         self.last_event_time: float | None = None
-        self.conversation: list[dict[str, object]] = []
+        # Built once; the prompt never changes for the life of the process.
+        self._system_message: dict[str, object] = {
+            "role": "system",
+            "content": [{"type": "input_text", "text": self.gpt.config.prompt}],
+        }
+        self.history: list[dict[str, object]] = []
+        # Guards history edits by the worker against the snapshot stop() saves, in
+        # case the worker is still mid-reply when its join times out.
+        self._history_lock = threading.Lock()
         self._reset_conversation()
+        self._load_state()
 
     def start(self) -> None:
         log.info("Starting Halloween orchestrator")
@@ -46,13 +73,31 @@ class HalloweenOrchestrator:
             raise
         self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
         self.worker_thread.start()
+        self._tts_thread = threading.Thread(target=self._tts_loop, daemon=True)
+        self._tts_thread.start()
         log.info("Halloween orchestrator running")
 
     def stop(self) -> None:
-        self.worker_stop.set()
+        with self._event_cv:
+            self.worker_stop.set()
+            self._event_cv.notify()
         if self.worker_thread and self.worker_thread.is_alive():
             self.worker_thread.join(timeout=2.0)
+            if self.worker_thread.is_alive():
+                log.warning("Worker still handling an event at shutdown; saving the conversation so far")
             self.worker_thread = None
+        if self._tts_thread and self._tts_thread.is_alive():
+            # Abort playback first so the TTS thread is out of the output stream
+            # before voice.close() below releases it.
+            self.voice.abort()
+            try:
+                self._tts_queue.put(_STOP, timeout=2.0)
+            except queue.Full:
+                log.warning("TTS queue still full at shutdown")
+            self._tts_thread.join(timeout=2.0)
+            if self._tts_thread.is_alive():
+                log.warning("TTS thread still running at shutdown")
+            self._tts_thread = None
         try:
             self.camera.stop()
         except Exception:  # noqa: BLE001
@@ -61,44 +106,49 @@ class HalloweenOrchestrator:
             self.audio.stop()
         except Exception:  # noqa: BLE001
             log.exception("Audio shutdown failed")
+        self.whisper.close()
+        self.voice.close()
+        self.gpt.close()
+        self.http.close()
+        self._save_state()
         log.info("Halloween orchestrator stopped")
 
     def _queue_camera_event(self, event: CameraEvent) -> None:
         log.info("Camera detected %d face(s)", len(event.faces))
-        self.camera_events.put(event)
+        with self._event_cv:
+            if self._latest_event is not None:
+                log.debug("Replacing unhandled camera event %s", self._latest_event.image_path)
+            self._latest_event = event
+            self._event_cv.notify()
 
     def _worker_loop(self) -> None:
-        while not self.worker_stop.is_set():
-            try:
-                event = self.camera_events.get(timeout=0.5)
-            except queue.Empty:
-                continue
-            event = self._consume_backlog(event)
-            self._handle_event(event)
-
-    def _consume_backlog(self, first_event: CameraEvent) -> CameraEvent:
-        latest = first_event
-        discarded = 0
         while True:
-            try:
-                latest = self.camera_events.get_nowait()
-                discarded += 1
-            except queue.Empty:
-                break
-        if discarded:
-            log.debug("Dropped %d queued camera event(s), keeping most recent", discarded)
-        return latest
+            with self._event_cv:
+                self._event_cv.wait_for(lambda: self._latest_event is not None or self.worker_stop.is_set())
+                if self.worker_stop.is_set():
+                    break
+                event, self._latest_event = self._latest_event, None
+            assert event is not None
+            self._handle_event(event)
 
     def _handle_event(self, event: CameraEvent) -> None:
-        print("handl event")
+        log.debug("Handling camera event %s", event.image_path)
         if self.events_since_reset > 20:
             log.info("Resetting conversation after 20 events")
             self._reset_conversation()
-        print(f"Time since last recorded event {self.last_event_time and event.timestamp - self.last_event_time} num events {self.events_since_reset}")
+        log.debug(
+            "time_since_last=%s events=%d",
+            (event.timestamp - self.last_event_time) if self.last_event_time else None,
+            self.events_since_reset,
+        )
         if (self.last_event_time and event.timestamp - self.last_event_time > self.inactivity_reset_seconds):
             log.info("Resetting conversation after %.1fs of inactivity", event.timestamp - self.last_event_time)
             self._reset_conversation()
         self.last_event_time = event.timestamp
+        if self._tts_queue.full():
+            # Leave the transcript buffered for the next event rather than discard it.
+            log.warning("Still speaking earlier replies; skipping event")
+            return
         transcript = self.audio.get_recent_transcript()
         include_image = self.events_since_reset % 3 == 0 and self.images_sent < 2
         response = None
@@ -107,29 +157,49 @@ class HalloweenOrchestrator:
             user_text = transcript #self.gpt.build_user_text(transcript)
         else:
             if not include_image:
-                print("No image or text. Skipping")
+                log.debug("No image or text; skipping event")
                 return
         if event.image_path and include_image:
             self.images_sent += 1
-        print("Sending AI message")
+        log.debug("Sending AI message")
         messages = self._prepare_messages(user_text, event.image_path if include_image else None)
-        response = self.gpt.generate(messages)
-        print("Got AI response")
+        sentences: queue.Queue[str | None] = queue.Queue()
+        self._tts_queue.put_nowait(sentences)
+        # Sentences reach the TTS thread as GPT streams them, so the first words
+        # play while the rest of the reply is generated.
+        response = stream_sentences(self.gpt.generate_stream(messages), sentences)
         self.events_since_reset += 1
         if not response:
             log.warning("GPT did not return text for %s", event.image_path)
             return
         self._record_conversation(user_text, response)
-        self.audio.pause()
-        print("speaking")
+
+    def _tts_loop(self) -> None:
+        self.voice.warm()
+        while True:
+            reply = self._tts_queue.get()
+            if reply is _STOP:
+                break
+            self._speak_reply(reply)  # type: ignore[arg-type]
+
+    def _speak_reply(self, sentences: queue.Queue[str | None]) -> None:
         try:
-            self.voice.speak(response)
+            for sentence in iter(sentences.get, None):
+                if self.worker_stop.is_set():
+                    continue
+                if not self._tts_paused:
+                    self.audio.pause()
+                    self._tts_paused = True
+                self.voice.speak(sentence)
         finally:
-            self.audio.resume()
-        print("done speaking")
+            self.voice.finish_reply()
+            # Stay paused across back-to-back replies; resume once nothing is queued.
+            if self._tts_paused and self._tts_queue.empty():
+                self.audio.resume()
+                self._tts_paused = False
+            log.debug("Done speaking")
 
     def _prepare_messages(self, user_text: str, image_path: Optional[Path]) -> list[dict[str, object]]:
-        messages = list(self.conversation)
         content: list[dict[str, object]] = [{"type": "input_text", "text": user_text}]
         if image_path:
             try:
@@ -138,23 +208,79 @@ class HalloweenOrchestrator:
                 log.warning("Failed to encode image %s: %s", image_path, exc)
             else:
                 content.append({"type": "input_image", "image_url": image_url})
-        messages.append({"role": "user", "content": content})
-        return messages
+        return [self._system_message, *self.history, {"role": "user", "content": content}]
 
     def _record_conversation(self, user_text: str, assistant_text: str) -> None:
-        self.conversation.append({"role": "user", "content": [{"type": "input_text", "text": user_text}]})
-        self.conversation.append({"role": "assistant", "content": [{"type": "output_text", "text": assistant_text}]})
-        if len(self.conversation) > self.max_history_entries:
-            system_message = self.conversation[0]
-            tail = self.conversation[-(self.max_history_entries - 1) :]
-            self.conversation = [system_message] + tail
+        with self._history_lock:
+            self.history.append({"role": "user", "content": [{"type": "input_text", "text": user_text}]})
+            self.history.append({"role": "assistant", "content": [{"type": "output_text", "text": assistant_text}]})
+            # Caps count the system message, which is sent ahead of the history.
+            if len(self.history) + 1 > self.max_history_high_water:
+                del self.history[: -(self.max_history_entries - 1)]
+                log.debug("Trimmed conversation to %d entries; prompt cache prefix reset", len(self.history) + 1)
 
-    def _reset_conversation(self) -> None:
-        self.conversation = [
-            {
-                "role": "system",
-                "content": [{"type": "input_text", "text": self.gpt.config.prompt}],
+    def _load_state(self) -> None:
+        # Resuming the same message prefix keeps it warm in OpenAI's prompt cache.
+        path = self.gpt.config.state_path
+        try:
+            state = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            log.warning("Ignoring unreadable conversation state %s: %s", path, exc)
+            return
+        if not isinstance(state, dict) or state.get("prompt") != self.gpt.config.prompt:
+            log.info("Saved conversation uses a different prompt; starting fresh")
+            return
+        try:
+            history = self._validate_history(state.get("history"))
+            events_since_reset = int(state.get("events_since_reset", 0))
+            last_event_time = state.get("last_event_time")
+            # Restoring this lets the usual inactivity reset discard a stale conversation.
+            last_event_time = float(last_event_time) if last_event_time is not None else None
+        except (TypeError, ValueError) as exc:
+            log.warning("Ignoring malformed conversation state %s: %s", path, exc)
+            return
+        self.history = history
+        self.events_since_reset = events_since_reset
+        self.last_event_time = last_event_time
+        log.info("Restored %d conversation entries from %s", len(self.history), path)
+
+    @staticmethod
+    def _validate_history(history: object) -> list[dict[str, object]]:
+        # Entries must look like the ones _record_conversation writes.
+        if not isinstance(history, list):
+            raise TypeError("history is not a list")
+        for entry in history:
+            if not isinstance(entry, dict) or entry.get("role") not in {"user", "assistant"}:
+                raise ValueError("unexpected history entry")
+            content = entry.get("content")
+            if not isinstance(content, list) or not all(
+                isinstance(part, dict) and isinstance(part.get("type"), str) and isinstance(part.get("text"), str)
+                for part in content
+            ):
+                raise ValueError(f"unexpected content in {entry['role']} entry")
+        return history
+
+    def _save_state(self) -> None:
+        path = self.gpt.config.state_path
+        with self._history_lock:
+            state = {
+                "prompt": self.gpt.config.prompt,
+                "history": list(self.history),
+                "events_since_reset": self.events_since_reset,
+                "last_event_time": self.last_event_time,
             }
-        ]
-        self.events_since_reset = 0
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(state), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            log.warning("Failed to save conversation state to %s: %s", path, exc)
+
+    def _reset_conversation(self) -> None:
+        with self._history_lock:
+            self.history.clear()
+            self.events_since_reset = 0
         log.debug("GPT conversation state reset")
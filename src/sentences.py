@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import queue
+import re
+from typing import Iterator
+
+# A sentence needs a word character and ends at punctuation followed by
+# whitespace, so "3.5" and a leading "..." stay inside the sentence around them.
+_SENT_RE = re.compile(r"\W*\w.*?[.!?]+[\"')\]]*\s+", re.S)
+
+
+def stream_sentences(deltas: Iterator[str], sentences: queue.Queue[str | None]) -> str:
+    # Queue each complete sentence as soon as it has streamed, end the queue with
+    # None, and return the whole reply.
+    parts: list[str] = []
+    pending = ""
+    try:
+        for delta in deltas:
+            parts.append(delta)
+            pending += delta
+            cursor = 0
+            # Anchored at the cursor so no text between sentences is skipped; an
+            # unfinished tail stays in pending until more deltas arrive.
+            while (match := _SENT_RE.match(pending, cursor)) is not None:
+                sentences.put(match.group().strip())
+                cursor = match.end()
+            pending = pending[cursor:]
+        if pending.strip():
+            sentences.put(pending.strip())
+    finally:
+        sentences.put(None)
+    return "".join(parts).strip()
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-import io
+import asyncio
 import logging
+import threading
+from concurrent.futures import Future
 from dataclasses import dataclass
 from typing import Optional
 
-from openai import OpenAI
+import httpx
+from openai import NOT_GIVEN, AsyncOpenAI
 
-from .config import CONFIG, WhisperConfig
+from .config import WhisperConfig, get_config
+from .openai_transport import create_async_http_client
 
 
 log = logging.getLogger(__name__)
@@ -19,30 +23,54 @@ class WhisperResult:
 
 
 class WhisperClient:
-    def __init__(self, config: WhisperConfig | None = None) -> None:
-        self.config = config or CONFIG.whisper
+    def __init__(self, config: WhisperConfig | None = None, http_client: httpx.AsyncClient | None = None) -> None:
+        self.config = config or get_config().whisper
         api_key = self.config.api_key
         if not api_key:
             raise ValueError("OPENAI_API_KEY or WHISPER_API_KEY is required for transcription")
-        self.client = OpenAI(api_key=api_key)
+        # A borrowed pool belongs to the caller, which closes it.
+        self._owns_http = http_client is None
+        self.client = AsyncOpenAI(api_key=api_key, http_client=http_client or create_async_http_client())
+        # Requests from any thread run concurrently on this one event loop.
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="whisper-loop", daemon=True)
+        self._loop_thread.start()
 
-    def transcribe_wav(self, wav_bytes: bytes) -> Optional[WhisperResult]:
-        buffer = io.BytesIO(wav_bytes)
-        buffer.name = "audio.wav"
+    def submit_batch(self, wavs: list[bytes], prompt: str | None = None) -> Future[list[Optional[WhisperResult]]]:
+        return asyncio.run_coroutine_threadsafe(self.transcribe_batch(wavs, prompt=prompt), self._loop)
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        if self._owns_http:
+            try:
+                asyncio.run_coroutine_threadsafe(self.client.close(), self._loop).result(timeout=2.0)
+            except Exception as exc:  # noqa: BLE001
+                log.debug("Error closing Whisper client: %s", exc)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join(timeout=2.0)
+        if not self._loop.is_running():
+            self._loop.close()
+
+    async def transcribe_batch(self, wavs: list[bytes], prompt: str | None = None) -> list[Optional[WhisperResult]]:
+        # transcribe_wav never raises, so gather returns one result per WAV in order.
+        return list(await asyncio.gather(*(self.transcribe_wav(wav, prompt=prompt) for wav in wavs)))
+
+    async def transcribe_wav(self, wav_bytes: bytes, prompt: str | None = None) -> Optional[WhisperResult]:
+        # prompt carries the tail of earlier transcripts so Whisper keeps names and
+        # phrasing consistent across separately uploaded utterances.
         try:
-            response = self.client.audio.transcriptions.create(
+            response = await self.client.audio.transcriptions.create(
                 model=self.config.model,
-                file=buffer,
+                file=("audio.wav", wav_bytes, "audio/wav"),
+                prompt=prompt or NOT_GIVEN,
                 language="en"
             )
         except Exception as exc:  # noqa: BLE001
             log.error("Whisper request failed: %s", exc)
             return None
-        text = getattr(response, "text", None)
-        if not text:
-            log.warning("Whisper response missing text")
-            return None
-        cleaned = text.strip()
+        cleaned = (response.text or "").strip()
         if not cleaned:
+            log.warning("Whisper response missing text")
             return None
         return WhisperResult(text=cleaned)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import queue
+import unittest
+
+from src.sentences import stream_sentences
+
+
+def stream(deltas: list[str]) -> tuple[list[str], str]:
+    sentences: queue.Queue[str | None] = queue.Queue()
+    reply = stream_sentences(iter(deltas), sentences)
+    return list(iter(sentences.get, None)), reply
+
+
+class StreamSentencesTest(unittest.TestCase):
+    def test_decimal_in_one_delta_is_not_split(self) -> None:
+        spoken, reply = stream(["It costs 3.5 dollars. Buy it!"])
+        self.assertEqual(spoken, ["It costs 3.5 dollars.", "Buy it!"])
+        self.assertEqual(reply, "It costs 3.5 dollars. Buy it!")
+
+    def test_decimal_across_deltas_is_not_split(self) -> None:
+        spoken, _ = stream(["It costs 3", ".", "5 dollars.", " Run"])
+        self.assertEqual(spoken, ["It costs 3.5 dollars.", "Run"])
+
+    def test_leading_ellipsis_is_spoken(self) -> None:
+        spoken, _ = stream(["... Welcome, mortal. ", "Boo!! Stay"])
+        self.assertEqual(spoken, ["... Welcome, mortal.", "Boo!!", "Stay"])
+
+    def test_ellipsis_alone_joins_the_next_sentence(self) -> None:
+        spoken, _ = stream(["...", "Welcome."])
+        self.assertEqual(spoken, ["...Welcome."])
+
+    def test_queue_is_ended_when_the_stream_fails(self) -> None:
+        def deltas():
+            yield "Boo. "
+            raise RuntimeError("stream dropped")
+
+        sentences: queue.Queue[str | None] = queue.Queue()
+        with self.assertRaises(RuntimeError):
+            stream_sentences(deltas(), sentences)
+        self.assertEqual(list(iter(sentences.get, None)), ["Boo."])
+
+
+if __name__ == "__main__":
+    unittest.main()